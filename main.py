@@ -1,25 +1,219 @@
+import time
+
+# 尽早记录起点，后面所有的导入都计入启动耗时
+MAIN_START_TIME = time.perf_counter()
+
 import sys
 import os
-import time
-import threading
-from urllib.parse import urlparse
-from PySide6.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, 
-                               QWidget, QPushButton, QLabel, QLineEdit, QTextEdit, 
-                               QMessageBox, QFileDialog, QProgressBar, QGroupBox)
-from PySide6.QtCore import Qt, QThread, Signal, QTimer
-from PySide6.QtGui import QFont
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+
+
+class StartupMeasurement:
+    """统计 with 代码块耗时的上下文管理器（不依赖 contextlib，以便在其他导入之前使用）"""
+    
+    def __init__(self, profiler, record):
+        self.profiler = profiler
+        self.record = record
+    
+    def __enter__(self):
+        self.begin = self.profiler.elapsed()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.record:
+            self.record(self.begin, self.profiler.elapsed() - self.begin)
+        return False
+
+
+class StartupProfiler:
+    """启动耗时统计
+    
+    记录主要模块的导入耗时和启动过程中的关键时间点，时间均从 main.py 开始执行时算起。
+    首次绘制之后才发生的导入（如下载工具依赖的 requests）会标记为延迟加载。
+    生成报告时再读取进程创建时间，补充解释器启动（单文件打包时还包括解包）所花的时间。
+    """
+    
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.imports = []  # (模块, 开始时间, 耗时, 是否延迟加载)
+        self.marks = []    # (事件, 开始时间, 耗时)
+        self.first_paint = None
+        self.quit_after_paint = False
+    
+    def elapsed(self):
+        return time.perf_counter() - self.start
+    
+    def measure_import(self, name):
+        """统计一组导入语句的耗时，同一模块只记录第一次"""
+        if any(item[0] == name for item in self.imports):
+            return StartupMeasurement(self, None)
+        
+        def record(begin, duration):
+            self.imports.append((name, begin, duration, self.first_paint is not None))
+        return StartupMeasurement(self, record)
+    
+    def measure(self, label):
+        """统计一段启动流程的耗时"""
+        def record(begin, duration):
+            self.marks.append((label, begin, duration))
+        return StartupMeasurement(self, record)
+    
+    def mark_first_paint(self):
+        """记录主窗口首次绘制的时间"""
+        if self.first_paint is not None:
+            return
+        self.first_paint = self.elapsed()
+        self.marks.append(("首次绘制", self.first_paint, 0.0))
+        if self.quit_after_paint:
+            QTimer.singleShot(0, QApplication.quit)
+    
+    def format_report(self):
+        """生成启动耗时报告文本"""
+        # platform 导入较慢，只在生成报告时才需要
+        import platform
+        
+        result = f"启动耗时报告  {time.strftime('%Y-%m-%d %H:%M:%S')}\n"
+        result += f"Python {platform.python_version()}  {platform.platform()}"
+        result += "  (打包版)\n" if getattr(sys, "frozen", False) else "\n"
+        result += "=" * 50 + "\n\n"
+        
+        result += "模块导入:\n"
+        for name, begin, duration, deferred in self.imports:
+            suffix = "  (延迟加载)" if deferred else ""
+            result += f"   {name:<24} {duration * 1000:8.1f} ms{suffix}\n"
+        
+        result += "\n关键时间点:\n"
+        for label, begin, duration in self.marks:
+            result += f"   {label:<24} {begin * 1000:8.1f} ms"
+            if duration:
+                result += f"  (耗时 {duration * 1000:.1f} ms)"
+            result += "\n"
+        
+        process_label, launch_offset = self.launch_offset()
+        result += "\n"
+        if launch_offset is not None:
+            result += f"{process_label}到 main.py 开始执行: {launch_offset * 1000:.1f} ms\n"
+        if self.first_paint is not None:
+            result += f"main.py 开始执行到首次绘制: {self.first_paint * 1000:.1f} ms\n"
+            if launch_offset is not None:
+                result += f"{process_label}到首次绘制: {(launch_offset + self.first_paint) * 1000:.1f} ms\n"
+        return result
+    
+    def launch_offset(self):
+        """返回 (说明, 进程创建到 main.py 开始执行的秒数)，无法获取时秒数为 None
+        
+        单文件打包的程序由引导进程解包后再启动子进程运行 Python，
+        此时以引导进程（父进程）的创建时间为起点，才能把解包时间计算在内。
+        """
+        meipass = getattr(sys, "_MEIPASS", None)
+        if getattr(sys, "frozen", False) and meipass and os.path.basename(meipass).startswith("_MEI"):
+            label, pid = "引导进程创建（含单文件解包）", os.getppid()
+        else:
+            label, pid = "进程创建", os.getpid()
+        
+        try:
+            if sys.platform == "win32":
+                age = self._windows_process_age(pid)
+            elif sys.platform.startswith("linux"):
+                age = self._linux_process_age(pid)
+            else:
+                return label, None
+        except (OSError, ValueError, IndexError, AttributeError):
+            return label, None
+        return label, max(age - self.elapsed(), 0.0)
+    
+    @staticmethod
+    def _linux_process_age(pid):
+        """根据 /proc 计算进程已运行的秒数（精度为一个时钟周期）"""
+        with open(f"/proc/{pid}/stat") as f:
+            # 进程名可能包含空格，从最后一个右括号之后开始切分
+            fields = f.read().rsplit(")", 1)[1].split()
+        start_ticks = int(fields[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    
+    @staticmethod
+    def _windows_process_age(pid):
+        """通过 GetProcessTimes 计算进程已运行的秒数"""
+        import ctypes
+        from ctypes import wintypes
+        
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        kernel32.OpenProcess.restype = wintypes.HANDLE
+        kernel32.OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+        kernel32.GetProcessTimes.restype = wintypes.BOOL
+        kernel32.GetProcessTimes.argtypes = [wintypes.HANDLE] + [ctypes.POINTER(wintypes.FILETIME)] * 4
+        kernel32.GetSystemTimeAsFileTime.argtypes = [ctypes.POINTER(wintypes.FILETIME)]
+        kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+        
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            raise ctypes.WinError(ctypes.get_last_error())
+        try:
+            creation = wintypes.FILETIME()
+            exit_time = wintypes.FILETIME()
+            kernel_time = wintypes.FILETIME()
+            user_time = wintypes.FILETIME()
+            ok = kernel32.GetProcessTimes(handle, ctypes.byref(creation), ctypes.byref(exit_time),
+                                          ctypes.byref(kernel_time), ctypes.byref(user_time))
+            if not ok:
+                raise ctypes.WinError(ctypes.get_last_error())
+        finally:
+            kernel32.CloseHandle(handle)
+        
+        now = wintypes.FILETIME()
+        kernel32.GetSystemTimeAsFileTime(ctypes.byref(now))
+        
+        def to_ticks(filetime):
+            return (filetime.dwHighDateTime << 32) | filetime.dwLowDateTime
+        
+        # FILETIME 以 100 纳秒为单位
+        return (to_ticks(now) - to_ticks(creation)) / 1e7
+    
+    def write_report(self, report_path):
+        """把报告追加写入文件，便于逐个版本对比"""
+        report = self.format_report()
+        with open(report_path, "a", encoding="utf-8") as f:
+            f.write(report + "\n")
+        # 打包为无控制台程序时 stdout 为 None
+        if sys.stdout is not None:
+            print(report)
+
+
+startup_profiler = StartupProfiler(MAIN_START_TIME)
+
+with startup_profiler.measure_import("threading"):
+    import threading
+with startup_profiler.measure_import("errno"):
+    import errno
+with startup_profiler.measure_import("select"):
+    import select
+with startup_profiler.measure_import("struct"):
+    import struct
+with startup_profiler.measure_import("PySide6.QtCore"):
+    from PySide6.QtCore import Qt, QThread, Signal, QTimer
+with startup_profiler.measure_import("PySide6.QtGui"):
+    from PySide6.QtGui import QFont
+with startup_profiler.measure_import("PySide6.QtWidgets"):
+    from PySide6.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, 
+                                   QWidget, QPushButton, QLabel, QLineEdit, QTextEdit, 
+                                   QMessageBox, QFileDialog, QProgressBar, QGroupBox,
+                                   QCheckBox, QInputDialog)
 
 
 class FolderScanWorker(QThread):
     """文件夹扫描工作线程"""
     finished = Signal(str)
     
-    def __init__(self, folder_path):
+    def __init__(self, folder_path, watch=False):
         super().__init__()
         self.folder_path = folder_path
+        # 实时监控模式下边扫描边添加监听，扫描完成后交给监控线程
+        self.watch = watch
+        self.watcher = None
+        # 保留逐目录的大小索引，供实时监控和保存快照使用
+        self.index = None
     
     def run(self):
         try:
@@ -36,59 +230,45 @@ class FolderScanWorker(QThread):
         if not os.path.isdir(folder_path):
             return "错误：指定的路径不是文件夹！"
         
-        result = f"扫描路径: {folder_path}\n"
-        result += "=" * 50 + "\n\n"
-        
         try:
-            items = os.listdir(folder_path)
-            folders = []
-            
-            for item in items:
-                item_path = os.path.join(folder_path, item)
-                if os.path.isdir(item_path):
-                    try:
-                        size = self.get_folder_size(item_path)
-                        folders.append((item, size))
-                    except PermissionError:
-                        folders.append((item, "无权限访问"))
-                    except Exception as e:
-                        folders.append((item, f"错误: {str(e)}"))
-            
-            if not folders:
-                result += "该文件夹下没有子文件夹。"
+            index = FolderSizeIndex(folder_path)
+            if self.watch:
+                self.watcher = build_watched_index(index)
             else:
-                result += f"找到 {len(folders)} 个子文件夹:\n\n"
-                for folder_name, size in folders:
-                    if isinstance(size, int):
-                        size_str = self.format_size(size)
-                    else:
-                        size_str = size
-                    result += f"📁 {folder_name}\n"
-                    result += f"   大小: {size_str}\n\n"
-        
+                index.build()
         except PermissionError:
-            result += "错误：没有权限访问该文件夹！"
+            return self.format_result(folder_path, error="错误：没有权限访问该文件夹！")
         except Exception as e:
-            result += f"扫描时发生错误: {str(e)}"
+            return self.format_result(folder_path, error=f"扫描时发生错误: {str(e)}")
         
-        return result
+        self.index = index
+        return self.format_result(folder_path, index.subfolder_sizes())
     
-    def get_folder_size(self, folder_path):
-        """计算文件夹大小"""
-        total_size = 0
-        try:
-            for dirpath, dirnames, filenames in os.walk(folder_path):
-                for filename in filenames:
-                    file_path = os.path.join(dirpath, filename)
-                    try:
-                        total_size += os.path.getsize(file_path)
-                    except (OSError, FileNotFoundError):
-                        continue
-        except PermissionError:
-            raise PermissionError("无权限访问")
-        return total_size
+    @staticmethod
+    def format_result(folder_path, folders=(), error=None):
+        """生成扫描结果文本"""
+        result = f"扫描路径: {folder_path}\n"
+        result += "=" * 50 + "\n\n"
+        
+        if error:
+            return result + error
+        
+        if not folders:
+            result += "该文件夹下没有子文件夹。"
+        else:
+            result += f"找到 {len(folders)} 个子文件夹:\n\n"
+            for folder_name, size in folders:
+                if isinstance(size, int):
+                    size_str = FolderScanWorker.format_size(size)
+                else:
+                    size_str = size
+                result += f"📁 {folder_name}\n"
+                result += f"   大小: {size_str}\n\n"
+        
+        return result
     
-    def format_size(self, size_bytes):
+    @staticmethod
+    def format_size(size_bytes):
         """格式化文件大小"""
         if size_bytes == 0:
             return "0 B"
@@ -102,6 +282,1153 @@ class FolderScanWorker(QThread):
         return f"{size_bytes:.2f} {size_names[i]}"
 
 
+class FolderSizeIndex:
+    """逐目录大小索引
+    
+    记录每个目录直属文件的大小之和（direct）以及包含所有子目录的汇总大小（total），
+    文件数量同理（files / total_files）。无法读取的目录仍保留在索引中，大小记为 0，
+    错误信息记录在 errors 中。
+    文件变化时只需重新统计发生变化的那个目录，再把差值沿父目录链向上累加，
+    不必重新遍历整棵目录树。
+    """
+    
+    def __init__(self, root):
+        self.root = os.path.normpath(os.path.abspath(root))
+        self.direct = {}       # 目录 -> 直属文件大小之和
+        self.total = {}        # 目录 -> 含子目录的汇总大小
+        self.files = {}        # 目录 -> 直属文件数量
+        self.total_files = {}  # 目录 -> 含子目录的文件数量
+        self.children = {}     # 目录 -> 子目录路径集合
+        self.errors = {}       # 无法读取的目录 -> 错误信息
+        # 监控线程更新索引时，保存快照等操作需要持有同一把锁
+        self.lock = threading.RLock()
+    
+    def build(self, before_scan=None):
+        """完整遍历一次根目录，建立索引
+        
+        before_scan 会在统计每个目录之前调用，监控线程用它先添加监听再读取目录，
+        避免统计与监听之间发生的变化被漏掉。
+        """
+        self.direct.clear()
+        self.total.clear()
+        self.files.clear()
+        self.total_files.clear()
+        self.children.clear()
+        self.errors.clear()
+        # 根目录无法读取时直接抛出异常，由调用方提示
+        self._scan_dir(self.root)
+        self._index_subtree(self.root, before_scan)
+    
+    def subfolder_sizes(self):
+        """返回根目录下一级子文件夹的 (名称, 大小) 列表"""
+        folders = []
+        for path in sorted(self.children.get(self.root, ())):
+            size = self.errors.get(path, self.total.get(path, 0))
+            folders.append((os.path.basename(path), size))
+        return folders
+    
+    def refresh_dir(self, path, before_scan=None):
+        """重新统计单个目录并增量更新汇总大小
+        
+        新出现的子目录在统计前会先调用 before_scan。
+        返回 (新增目录列表, 移除目录列表)，供监控器增减监听对象。
+        """
+        path = os.path.normpath(path)
+        if path not in self.direct:
+            return [], []
+        
+        try:
+            size, files, subdirs = self._scan_dir(path)
+        except (FileNotFoundError, NotADirectoryError):
+            # 目录已被删除，整棵子树从索引中移除
+            delta = -self.total.get(path, 0)
+            files_delta = -self.total_files.get(path, 0)
+            removed = self._drop_subtree(path)
+            parent = os.path.dirname(path)
+            if path != self.root and parent in self.children:
+                self.children[parent].discard(path)
+                self._propagate(parent, delta, files_delta)
+            return [], removed
+        except OSError as e:
+            # 目录仍在但变得无法读取，保留目录本身并清空其下的统计
+            size, files, subdirs = 0, 0, set()
+            self.errors[path] = self._error_text(e)
+        else:
+            self.errors.pop(path, None)
+        
+        delta = size - self.direct[path]
+        files_delta = files - self.files[path]
+        self.direct[path] = size
+        self.files[path] = files
+        
+        old_subdirs = self.children.get(path, set())
+        added = []
+        removed = []
+        for subdir in subdirs - old_subdirs:
+            added.extend(self._index_subtree(subdir, before_scan))
+            delta += self.total.get(subdir, 0)
+            files_delta += self.total_files.get(subdir, 0)
+        for subdir in old_subdirs - subdirs:
+            delta -= self.total.get(subdir, 0)
+            files_delta -= self.total_files.get(subdir, 0)
+            removed.extend(self._drop_subtree(subdir))
+        self.children[path] = {d for d in subdirs if d in self.direct}
+        
+        self._propagate(path, delta, files_delta)
+        return added, removed
+    
+    def _scan_dir(self, path):
+        """统计目录直属文件的大小与数量，并返回其子目录集合"""
+        size = 0
+        files = 0
+        subdirs = set()
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.add(entry.path)
+                    elif not entry.is_dir():
+                        size += entry.stat().st_size
+                        files += 1
+                except OSError:
+                    continue
+        return size, files, subdirs
+    
+    def _index_subtree(self, top, before_scan=None):
+        """遍历并索引一棵新出现的子树，返回已索引的目录列表"""
+        order = []
+        stack = [top]
+        while stack:
+            path = stack.pop()
+            if before_scan:
+                before_scan(path)
+            try:
+                size, files, subdirs = self._scan_dir(path)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            except OSError as e:
+                # 无权限等情况仍列出该目录，结果中显示错误信息
+                size, files, subdirs = 0, 0, set()
+                self.errors[path] = self._error_text(e)
+            self.direct[path] = size
+            self.files[path] = files
+            self.children[path] = subdirs
+            order.append(path)
+            stack.extend(subdirs)
+        
+        # 先序遍历的逆序保证子目录总是先于父目录完成汇总
+        for path in reversed(order):
+            subdirs = {d for d in self.children[path] if d in self.direct}
+            self.children[path] = subdirs
+            self.total[path] = self.direct[path] + sum(self.total[d] for d in subdirs)
+            self.total_files[path] = self.files[path] + sum(self.total_files[d] for d in subdirs)
+        return order
+    
+    @staticmethod
+    def _error_text(error):
+        """生成无法读取目录时显示的错误信息"""
+        if isinstance(error, PermissionError):
+            return "无权限访问"
+        return f"错误: {str(error)}"
+    
+    def _drop_subtree(self, top):
+        """从索引中移除一棵子树，返回被移除的目录列表"""
+        removed = []
+        stack = [top]
+        while stack:
+            path = stack.pop()
+            if path not in self.direct:
+                continue
+            del self.direct[path]
+            self.total.pop(path, None)
+            self.files.pop(path, None)
+            self.total_files.pop(path, None)
+            self.errors.pop(path, None)
+            stack.extend(self.children.pop(path, ()))
+            removed.append(path)
+        return removed
+    
+    def _propagate(self, path, delta, files_delta=0):
+        """把大小与文件数量的差值累加到该目录及其所有上级目录"""
+        if not delta and not files_delta:
+            return
+        while path in self.total:
+            self.total[path] += delta
+            self.total_files[path] += files_delta
+            if path == self.root:
+                break
+            parent = os.path.dirname(path)
+            if parent == path:
+                break
+            path = parent
+
+
+class InotifyWatcher:
+    """基于 Linux inotify 的目录变化监听器"""
+    name = "inotify"
+    
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    
+    WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+                  | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+    EVENT_HEADER = struct.Struct("iIII")
+    
+    def __init__(self, directories):
+        # ctypes 只在开启实时监控时才需要，不在启动时导入
+        import ctypes
+        import ctypes.util
+        libc_name = ctypes.util.find_library("c")
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.get_errno = ctypes.get_errno
+        self.fd = self.libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            err = self.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.wd_to_path = {}
+        self.path_to_wd = {}
+        self.overflowed = False
+        try:
+            for path in directories:
+                self.add_watch(path)
+        except OSError:
+            self.close()
+            raise
+    
+    def add_watch(self, path):
+        """为单个目录添加监听（inotify 不支持递归监听）"""
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            err = self.get_errno()
+            if err in (errno.ENOENT, errno.EACCES, errno.ENOTDIR):
+                return
+            # ENOSPC 表示超出 max_user_watches 限制，交由调用方改用轮询
+            raise OSError(err, os.strerror(err), path)
+        # 目录被重命名后，同一个 inode 会返回原来的 wd，此时把它改挂到新路径上
+        old_path = self.wd_to_path.get(wd)
+        if old_path is not None and old_path != path:
+            self.path_to_wd.pop(old_path, None)
+        self.wd_to_path[wd] = path
+        self.path_to_wd[path] = wd
+    
+    def remove_watch(self, path):
+        """移除单个目录的监听"""
+        wd = self.path_to_wd.pop(path, None)
+        if wd is None:
+            return
+        owner = self.wd_to_path.get(wd)
+        # wd 已经改挂到重命名后的新路径时，监听仍在使用，不能撤销
+        if owner is None or owner == path:
+            self.wd_to_path.pop(wd, None)
+            self.libc.inotify_rm_watch(self.fd, wd)
+    
+    def poll(self, timeout):
+        """等待变化，返回发生变化的目录集合"""
+        changed = set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return changed
+        # 短暂合并连续事件，避免大文件写入时反复统计同一目录
+        time.sleep(0.2)
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, name_len = self.EVENT_HEADER.unpack_from(data, offset)
+                offset += self.EVENT_HEADER.size + name_len
+                if mask & self.IN_Q_OVERFLOW:
+                    self.overflowed = True
+                    continue
+                path = self.wd_to_path.get(wd)
+                if path is None:
+                    continue
+                if mask & self.IN_IGNORED:
+                    # 目录被删除后内核会自动撤销监听
+                    self.wd_to_path.pop(wd, None)
+                    self.path_to_wd.pop(path, None)
+                elif mask & self.IN_MOVE_SELF:
+                    # 目录已移走，旧路径不再有效；保留 path_to_wd 以便移除旧路径时撤销监听，
+                    # 若目录仍在根目录内，重新索引新路径时 add_watch 会把这个 wd 挂到新路径上
+                    self.wd_to_path.pop(wd, None)
+                changed.add(path)
+        return changed
+    
+    def close(self):
+        """关闭 inotify 句柄"""
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingWatcher:
+    """轮询方式的目录变化监听器（inotify / ReadDirectoryChangesW 不可用时的后备方案）
+    
+    只比较各目录自身的修改时间，不逐个统计文件；目录中有文件新增、删除或重命名时
+    目录修改时间会改变，已有文件原地改写则需等待其所在目录下一次发生变化。
+    """
+    name = "轮询"
+    
+    def __init__(self, directories, interval=2.0):
+        self.interval = interval
+        self.mtimes = {}
+        self.overflowed = False
+        self.next_poll = time.monotonic() + interval
+        for path in directories:
+            self.add_watch(path)
+    
+    def add_watch(self, path):
+        """记录目录当前的修改时间"""
+        try:
+            self.mtimes[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            self.mtimes[path] = None
+    
+    def remove_watch(self, path):
+        """停止跟踪目录"""
+        self.mtimes.pop(path, None)
+    
+    def poll(self, timeout):
+        """最多等待 timeout 秒，轮询周期到达时返回修改时间发生变化的目录集合
+        
+        timeout 只用于让监控线程及时响应停止请求，两次检查之间始终间隔 interval 秒。
+        """
+        changed = set()
+        remaining = self.next_poll - time.monotonic()
+        if remaining > 0:
+            time.sleep(min(timeout, remaining))
+            if time.monotonic() < self.next_poll:
+                return changed
+        
+        for path, old_mtime in list(self.mtimes.items()):
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime != old_mtime:
+                self.mtimes[path] = mtime
+                changed.add(path)
+        self.next_poll = time.monotonic() + self.interval
+        return changed
+    
+    def close(self):
+        self.mtimes.clear()
+
+
+class WindowsDirectoryWatcher:
+    """基于 Windows ReadDirectoryChangesW 的目录变化监听器
+    
+    只需对根目录开启一次子树监听（bWatchSubtree），文件原地写入导致的大小变化也会收到通知，
+    因此 add_watch / remove_watch 无需做任何事。
+    """
+    name = "ReadDirectoryChangesW"
+    
+    FILE_LIST_DIRECTORY = 0x0001
+    FILE_SHARE_READ = 0x00000001
+    FILE_SHARE_WRITE = 0x00000002
+    FILE_SHARE_DELETE = 0x00000004
+    OPEN_EXISTING = 3
+    FILE_FLAG_BACKUP_SEMANTICS = 0x02000000
+    FILE_FLAG_OVERLAPPED = 0x40000000
+    FILE_NOTIFY_CHANGE_FILE_NAME = 0x00000001
+    FILE_NOTIFY_CHANGE_DIR_NAME = 0x00000002
+    FILE_NOTIFY_CHANGE_SIZE = 0x00000008
+    FILE_NOTIFY_CHANGE_LAST_WRITE = 0x00000010
+    WAIT_OBJECT_0 = 0
+    ERROR_NOTIFY_ENUM_DIR = 1022
+    
+    NOTIFY_FILTER = (FILE_NOTIFY_CHANGE_FILE_NAME | FILE_NOTIFY_CHANGE_DIR_NAME
+                     | FILE_NOTIFY_CHANGE_SIZE | FILE_NOTIFY_CHANGE_LAST_WRITE)
+    NOTIFY_HEADER = struct.Struct("<III")  # NextEntryOffset, Action, FileNameLength
+    BUFFER_SIZE = 64 * 1024
+    
+    def __init__(self, root):
+        # ctypes 只在开启实时监控时才需要，不在启动时导入
+        import ctypes
+        from ctypes import wintypes
+        
+        class OVERLAPPED(ctypes.Structure):
+            _fields_ = [
+                ("Internal", ctypes.c_void_p),
+                ("InternalHigh", ctypes.c_void_p),
+                ("Offset", wintypes.DWORD),
+                ("OffsetHigh", wintypes.DWORD),
+                ("hEvent", wintypes.HANDLE),
+            ]
+        
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        kernel32.CreateFileW.restype = wintypes.HANDLE
+        kernel32.CreateFileW.argtypes = [wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, wintypes.LPVOID,
+                                         wintypes.DWORD, wintypes.DWORD, wintypes.HANDLE]
+        kernel32.CreateEventW.restype = wintypes.HANDLE
+        kernel32.CreateEventW.argtypes = [wintypes.LPVOID, wintypes.BOOL, wintypes.BOOL, wintypes.LPCWSTR]
+        kernel32.ResetEvent.argtypes = [wintypes.HANDLE]
+        kernel32.ReadDirectoryChangesW.restype = wintypes.BOOL
+        kernel32.ReadDirectoryChangesW.argtypes = [wintypes.HANDLE, wintypes.LPVOID, wintypes.DWORD, wintypes.BOOL,
+                                                   wintypes.DWORD, wintypes.LPDWORD, wintypes.LPVOID, wintypes.LPVOID]
+        kernel32.WaitForSingleObject.restype = wintypes.DWORD
+        kernel32.WaitForSingleObject.argtypes = [wintypes.HANDLE, wintypes.DWORD]
+        kernel32.GetOverlappedResult.restype = wintypes.BOOL
+        kernel32.GetOverlappedResult.argtypes = [wintypes.HANDLE, wintypes.LPVOID, wintypes.LPDWORD, wintypes.BOOL]
+        kernel32.CancelIoEx.argtypes = [wintypes.HANDLE, wintypes.LPVOID]
+        kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+        
+        self.ctypes = ctypes
+        self.wintypes = wintypes
+        self.kernel32 = kernel32
+        self.root = root
+        self.overflowed = False
+        self.event = None
+        
+        self.handle = kernel32.CreateFileW(
+            root,
+            self.FILE_LIST_DIRECTORY,
+            self.FILE_SHARE_READ | self.FILE_SHARE_WRITE | self.FILE_SHARE_DELETE,
+            None,
+            self.OPEN_EXISTING,
+            self.FILE_FLAG_BACKUP_SEMANTICS | self.FILE_FLAG_OVERLAPPED,
+            None
+        )
+        if not self.handle or self.handle == wintypes.HANDLE(-1).value:
+            self.handle = None
+            raise ctypes.WinError(ctypes.get_last_error())
+        try:
+            self.event = kernel32.CreateEventW(None, True, False, None)
+            if not self.event:
+                raise ctypes.WinError(ctypes.get_last_error())
+            self.overlapped = OVERLAPPED()
+            self.overlapped.hEvent = self.event
+            self.buffer = ctypes.create_string_buffer(self.BUFFER_SIZE)
+            self._start_read()
+        except OSError:
+            self.close()
+            raise
+    
+    def _start_read(self):
+        """发起下一次异步读取"""
+        self.kernel32.ResetEvent(self.event)
+        ok = self.kernel32.ReadDirectoryChangesW(
+            self.handle,
+            self.buffer,
+            self.BUFFER_SIZE,
+            True,
+            self.NOTIFY_FILTER,
+            None,
+            self.ctypes.byref(self.overlapped),
+            None
+        )
+        if not ok:
+            raise self.ctypes.WinError(self.ctypes.get_last_error())
+    
+    def add_watch(self, path):
+        pass
+    
+    def remove_watch(self, path):
+        pass
+    
+    def poll(self, timeout):
+        """等待变化，返回发生变化的目录集合"""
+        changed = set()
+        wait_ms = int(timeout * 1000)
+        while self.kernel32.WaitForSingleObject(self.event, wait_ms) == self.WAIT_OBJECT_0:
+            transferred = self.wintypes.DWORD()
+            ok = self.kernel32.GetOverlappedResult(
+                self.handle, self.ctypes.byref(self.overlapped), self.ctypes.byref(transferred), False
+            )
+            if not ok:
+                err = self.ctypes.get_last_error()
+                if err != self.ERROR_NOTIFY_ENUM_DIR:
+                    raise self.ctypes.WinError(err)
+                self.overflowed = True
+            elif transferred.value == 0:
+                # 缓冲区溢出时系统不返回具体变化
+                self.overflowed = True
+            else:
+                self._parse_events(self.buffer.raw[:transferred.value], changed)
+            self._start_read()
+            # 短暂合并连续事件，避免大文件写入时反复统计同一目录
+            time.sleep(0.2)
+            wait_ms = 0
+        return changed
+    
+    def _parse_events(self, data, changed):
+        """解析 FILE_NOTIFY_INFORMATION 链表，记录变化项所在的目录"""
+        offset = 0
+        while True:
+            next_offset, _, name_len = self.NOTIFY_HEADER.unpack_from(data, offset)
+            name_start = offset + self.NOTIFY_HEADER.size
+            name = data[name_start:name_start + name_len].decode("utf-16-le", "surrogatepass")
+            changed.add(os.path.dirname(os.path.join(self.root, name)))
+            if next_offset == 0:
+                break
+            offset += next_offset
+    
+    def close(self):
+        """取消未完成的读取并关闭句柄"""
+        if self.handle:
+            self.kernel32.CancelIoEx(self.handle, None)
+            if self.event:
+                # 等待取消完成，避免系统继续写入即将释放的缓冲区
+                transferred = self.wintypes.DWORD()
+                self.kernel32.GetOverlappedResult(
+                    self.handle, self.ctypes.byref(self.overlapped), self.ctypes.byref(transferred), True
+                )
+            self.kernel32.CloseHandle(self.handle)
+            self.handle = None
+        if self.event:
+            self.kernel32.CloseHandle(self.event)
+            self.event = None
+
+
+def create_folder_watcher(root, directories):
+    """Linux 使用 inotify，Windows 使用 ReadDirectoryChangesW，都不可用时退回轮询"""
+    directories = list(directories)
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(directories)
+        except (OSError, AttributeError):
+            pass
+    elif sys.platform == "win32":
+        try:
+            return WindowsDirectoryWatcher(root)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(directories)
+
+
+def build_watched_index(index):
+    """建立索引的同时添加监听，返回监听器
+    
+    每个目录都先添加监听再统计，统计过程中发生的变化会在第一次 poll 时收到，不会漏掉。
+    """
+    watcher = create_folder_watcher(index.root, ())
+    
+    def before_scan(path):
+        nonlocal watcher
+        try:
+            watcher.add_watch(path)
+        except OSError:
+            # inotify 监听数量超出系统限制时，改用轮询继续
+            watcher.close()
+            watcher = PollingWatcher(index.direct)
+            watcher.add_watch(path)
+    
+    try:
+        index.build(before_scan)
+    except BaseException:
+        watcher.close()
+        raise
+    return watcher
+
+
+class FolderWatchWorker(QThread):
+    """文件夹实时监控线程"""
+    sizes_updated = Signal(str)
+    status_changed = Signal(str)
+    
+    def __init__(self, index, watcher=None):
+        super().__init__()
+        self.index = index
+        # 扫描时已经建好的监听器；没有时在线程中重新建立索引并添加监听
+        self.watcher = watcher
+        self.is_stopped = False
+        self.status_note = ""
+    
+    def run(self):
+        watcher = self.watcher
+        if watcher is None:
+            # 索引可能已经过时，先添加监听再重新统计一遍，之后的变化都会收到通知
+            self.status_changed.emit("正在建立实时监控...")
+            try:
+                with self.index.lock:
+                    watcher = build_watched_index(self.index)
+            except Exception as e:
+                self.status_changed.emit(f"监控启动失败: {str(e)}")
+                return
+            self.emit_report()
+        
+        if isinstance(watcher, PollingWatcher):
+            self.status_note = "；轮询模式下已有文件原地写入不会立即更新"
+        self.status_changed.emit(
+            f"实时监控中（{watcher.name}），已监听 {len(self.index.direct)} 个目录{self.status_note}"
+        )
+        try:
+            while not self.is_stopped:
+                changed = watcher.poll(0.5)
+                if watcher.overflowed:
+                    # 事件队列溢出后无法确定变化范围，只能完整重建一次
+                    watcher.overflowed = False
+                    with self.index.lock:
+                        for path in list(self.index.direct):
+                            watcher.remove_watch(path)
+                        self.index.build(watcher.add_watch)
+                    self.emit_report()
+                    continue
+                if not changed:
+                    continue
+                
+                # 先处理上级目录，被删除的子树无需再单独统计；
+                # 新目录在统计前就已添加监听，统计期间写入的文件会触发下一轮更新
+                with self.index.lock:
+                    for path in sorted(changed, key=len):
+                        _, removed = self.index.refresh_dir(path, watcher.add_watch)
+                        for removed_path in removed:
+                            watcher.remove_watch(removed_path)
+                self.emit_report()
+        except Exception as e:
+            self.status_changed.emit(f"监控出错: {str(e)}")
+        finally:
+            watcher.close()
+    
+    def emit_report(self):
+        """发送最新的扫描结果文本"""
+        with self.index.lock:
+            folders = self.index.subfolder_sizes()
+        result = FolderScanWorker.format_result(self.index.root, folders)
+        self.sizes_updated.emit(result)
+        self.status_changed.emit(f"实时监控中，最近更新: {time.strftime('%H:%M:%S')}{self.status_note}")
+    
+    def stop(self):
+        """停止监控"""
+        self.is_stopped = True
+
+
+class ScanSnapshot:
+    """扫描快照文件
+    
+    文件格式（小端）：
+      文件头  magic(4s) version(H) root_len(H) created(d) count(Q)
+      根路径  root_len 字节（os.fsencode 编码）
+      记录区  count 条 (路径哈希 Q, 父目录哈希 Q, 汇总大小 Q, 文件数量 Q, 自身文件大小 Q, 名称偏移 Q)，
+              按路径哈希升序排列；根目录的父目录哈希为 0
+      名称区  每条为 长度(I) + 相对根目录的路径（os.fsencode 编码）
+    对比时只需顺序分块读取记录区，名称只在输出结果时按偏移定位读取。
+    """
+    MAGIC = b"DSNP"
+    VERSION = 2
+    HEADER = struct.Struct("<4sHHdQ")
+    RECORD = struct.Struct("<QQQQQQ")
+    NAME_LEN = struct.Struct("<I")
+    CHUNK_RECORDS = 8192
+    ROOT_NAME = "."
+    
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        try:
+            header = self.file.read(self.HEADER.size)
+            if len(header) != self.HEADER.size:
+                raise ValueError(f"不是有效的扫描快照文件: {path}")
+            magic, version, root_len, self.created, self.count = self.HEADER.unpack(header)
+            if magic != self.MAGIC:
+                raise ValueError(f"不是有效的扫描快照文件: {path}")
+            if version != self.VERSION:
+                raise ValueError(f"不支持的快照版本: {version}")
+            self.root = os.fsdecode(self.file.read(root_len))
+        except Exception:
+            self.file.close()
+            raise
+        self.records_offset = self.HEADER.size + root_len
+        self.names_offset = self.records_offset + self.count * self.RECORD.size
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        self.file.close()
+    
+    def iter_records(self):
+        """按路径哈希顺序逐块读取 (哈希, 父目录哈希, 大小, 文件数量, 自身文件大小, 名称偏移) 记录"""
+        with open(self.path, "rb") as f:
+            f.seek(self.records_offset)
+            remaining = self.count
+            while remaining:
+                n = min(remaining, self.CHUNK_RECORDS)
+                data = f.read(n * self.RECORD.size)
+                if len(data) != n * self.RECORD.size:
+                    raise ValueError(f"快照文件已损坏: {self.path}")
+                yield from self.RECORD.iter_unpack(data)
+                remaining -= n
+    
+    def contains(self, path_hash):
+        """在记录区二分查找路径哈希，只读取 O(log n) 条记录"""
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            self.file.seek(self.records_offset + mid * self.RECORD.size)
+            (value,) = struct.unpack("<Q", self.file.read(8))
+            if value < path_hash:
+                low = mid + 1
+            elif value > path_hash:
+                high = mid
+            else:
+                return True
+        return False
+    
+    def read_name(self, offset):
+        """按偏移读取记录对应的相对路径"""
+        self.file.seek(self.names_offset + offset)
+        (length,) = self.NAME_LEN.unpack(self.file.read(self.NAME_LEN.size))
+        return os.fsdecode(self.file.read(length))
+    
+    @staticmethod
+    def path_hash(rel_path):
+        """计算相对路径的 64 位哈希"""
+        import hashlib
+        
+        if isinstance(rel_path, str):
+            # 与 os.fsencode 一致，Linux 下非 UTF-8 文件名也能按原始字节编码
+            rel_path = os.fsencode(rel_path)
+        digest = hashlib.blake2b(rel_path, digest_size=8).digest()
+        return int.from_bytes(digest, "little")
+    
+    @classmethod
+    def save(cls, index, path):
+        """把索引中的全部目录写入快照文件，返回目录数量"""
+        with index.lock:
+            root = index.root
+            records = []
+            for dirpath, size in index.total.items():
+                rel_path = os.path.relpath(dirpath, root).replace(os.sep, "/")
+                encoded = os.fsencode(rel_path)
+                if rel_path == cls.ROOT_NAME:
+                    parent_hash = 0
+                else:
+                    parent_hash = cls.path_hash(rel_path.rpartition("/")[0] or cls.ROOT_NAME)
+                records.append((cls.path_hash(encoded), parent_hash, size, index.total_files[dirpath],
+                                index.direct[dirpath], encoded))
+        records.sort()
+        
+        # 先写临时文件再替换，避免中途失败留下损坏的快照
+        tmp_path = path + ".tmp"
+        root_bytes = os.fsencode(root)
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, len(root_bytes), time.time(), len(records)))
+                f.write(root_bytes)
+                
+                name_offset = 0
+                for start in range(0, len(records), cls.CHUNK_RECORDS):
+                    chunk = bytearray()
+                    for path_hash, parent_hash, size, files, direct, encoded in records[start:start + cls.CHUNK_RECORDS]:
+                        chunk += cls.RECORD.pack(path_hash, parent_hash, size, files, direct, name_offset)
+                        name_offset += cls.NAME_LEN.size + len(encoded)
+                    f.write(chunk)
+                
+                for start in range(0, len(records), cls.CHUNK_RECORDS):
+                    chunk = bytearray()
+                    for *_, encoded in records[start:start + cls.CHUNK_RECORDS]:
+                        chunk += cls.NAME_LEN.pack(len(encoded))
+                        chunk += encoded
+                    f.write(chunk)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        return len(records)
+
+
+def diff_scan_snapshots(old_path, new_path, limit=20):
+    """对两个快照做归并对比
+    
+    两份记录都按路径哈希排序，顺序读取一遍即可完成匹配；每一类结果只用大小为 limit
+    的最小堆保留最大的若干项，内存占用与快照大小无关。
+    
+    增长/减少按目录自身文件大小的变化排序，避免一处变化让整条祖先链占满列表；
+    新增/删除只报告最上层的目录：父目录在另一份快照中不存在的记录会被跳过。
+    这一判断在记录确实能进入堆时才做（二分查找），所以大部分记录不产生额外读取。
+    """
+    # 快照功能才用到的模块，不在启动时导入
+    import heapq
+    
+    root_hash = ScanSnapshot.path_hash(ScanSnapshot.ROOT_NAME)
+    categories = {"growers": [], "shrinkers": [], "added": [], "deleted": []}
+    counter = 0
+    
+    def push(category, key, old_record, new_record, is_nested=None):
+        nonlocal counter
+        heap = categories[category]
+        if len(heap) >= limit and key <= heap[0][0]:
+            return
+        if is_nested is not None and is_nested():
+            return
+        counter += 1
+        item = (key, counter, old_record, new_record)
+        if len(heap) < limit:
+            heapq.heappush(heap, item)
+        else:
+            heapq.heapreplace(heap, item)
+    
+    with ScanSnapshot(old_path) as old, ScanSnapshot(new_path) as new:
+        old_records = old.iter_records()
+        new_records = new.iter_records()
+        old_record = next(old_records, None)
+        new_record = next(new_records, None)
+        old_root = new_root = None
+        
+        while old_record is not None or new_record is not None:
+            if new_record is None or (old_record is not None and old_record[0] < new_record[0]):
+                if old_record[0] == root_hash:
+                    old_root = old_record
+                else:
+                    # 父目录在新快照中也不存在时，它已作为更上层的删除目录计入
+                    parent_hash = old_record[1]
+                    push("deleted", old_record[2], old_record, None,
+                         lambda: not new.contains(parent_hash))
+                old_record = next(old_records, None)
+            elif old_record is None or new_record[0] < old_record[0]:
+                if new_record[0] == root_hash:
+                    new_root = new_record
+                else:
+                    parent_hash = new_record[1]
+                    push("added", new_record[2], None, new_record,
+                         lambda: not old.contains(parent_hash))
+                new_record = next(new_records, None)
+            else:
+                if old_record[0] == root_hash:
+                    old_root, new_root = old_record, new_record
+                else:
+                    delta = new_record[4] - old_record[4]
+                    if delta > 0:
+                        push("growers", delta, old_record, new_record)
+                    elif delta < 0:
+                        push("shrinkers", -delta, old_record, new_record)
+                old_record = next(old_records, None)
+                new_record = next(new_records, None)
+        
+        result = {
+            "old_root": old.root,
+            "new_root": new.root,
+            "old_created": old.created,
+            "new_created": new.created,
+            "old_count": old.count,
+            "new_count": new.count,
+            "old_total": old_root[2] if old_root else 0,
+            "new_total": new_root[2] if new_root else 0,
+        }
+        for category, heap in categories.items():
+            entries = []
+            for _, _, old_rec, new_rec in sorted(heap, reverse=True):
+                name = old.read_name(old_rec[5]) if old_rec else new.read_name(new_rec[5])
+                entries.append({
+                    "name": name,
+                    "old_size": old_rec[2] if old_rec else 0,
+                    "new_size": new_rec[2] if new_rec else 0,
+                    "old_files": old_rec[3] if old_rec else 0,
+                    "new_files": new_rec[3] if new_rec else 0,
+                    "old_direct": old_rec[4] if old_rec else 0,
+                    "new_direct": new_rec[4] if new_rec else 0,
+                })
+            result[category] = entries
+    return result
+
+
+def format_snapshot_diff(diff):
+    """生成快照对比结果文本"""
+    format_size = FolderScanWorker.format_size
+    
+    def format_delta(delta):
+        sign = "+" if delta >= 0 else "-"
+        return f"{sign}{format_size(abs(delta))}"
+    
+    def format_time(timestamp):
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+    
+    result = f"旧快照: {diff['old_root']}（{format_time(diff['old_created'])}，{diff['old_count']} 个目录）\n"
+    result += f"新快照: {diff['new_root']}（{format_time(diff['new_created'])}，{diff['new_count']} 个目录）\n"
+    result += f"总大小: {format_size(diff['old_total'])} → {format_size(diff['new_total'])}"
+    result += f"（{format_delta(diff['new_total'] - diff['old_total'])}）\n"
+    result += "=" * 50 + "\n\n"
+    
+    sections = [
+        ("growers", "增长最多的文件夹"),
+        ("shrinkers", "减少最多的文件夹"),
+        ("added", "新增的文件夹"),
+        ("deleted", "删除的文件夹"),
+    ]
+    for category, title in sections:
+        entries = diff[category]
+        result += f"{title}（{len(entries)}）:\n\n"
+        if not entries:
+            result += "   无\n\n"
+            continue
+        for entry in entries:
+            delta = entry["new_size"] - entry["old_size"]
+            files_delta = entry["new_files"] - entry["old_files"]
+            result += f"📁 {entry['name']}\n"
+            if category in ("growers", "shrinkers"):
+                direct_delta = entry["new_direct"] - entry["old_direct"]
+                result += f"   自身文件: {format_size(entry['old_direct'])} → {format_size(entry['new_direct'])}"
+                result += f"（{format_delta(direct_delta)}）\n"
+            result += f"   大小: {format_size(entry['old_size'])} → {format_size(entry['new_size'])}"
+            result += f"（{format_delta(delta)}）\n"
+            result += f"   文件数: {entry['old_files']} → {entry['new_files']}（{files_delta:+d}）\n\n"
+    return result
+
+
+class SnapshotSaveWorker(QThread):
+    """快照保存工作线程"""
+    finished = Signal(str)
+    
+    def __init__(self, index, save_path):
+        super().__init__()
+        self.index = index
+        self.save_path = save_path
+    
+    def run(self):
+        try:
+            count = ScanSnapshot.save(self.index, self.save_path)
+            self.finished.emit(f"快照已保存: {self.save_path}（{count} 个目录）")
+        except Exception as e:
+            self.finished.emit(f"保存快照失败: {str(e)}")
+
+
+class SnapshotDiffWorker(QThread):
+    """快照对比工作线程"""
+    finished = Signal(str)
+    
+    def __init__(self, old_path, new_path):
+        super().__init__()
+        self.old_path = old_path
+        self.new_path = new_path
+    
+    def run(self):
+        try:
+            diff = diff_scan_snapshots(self.old_path, self.new_path)
+            self.finished.emit(format_snapshot_diff(diff))
+        except Exception as e:
+            self.finished.emit(f"对比快照失败: {str(e)}")
+
+
+def device_key(path):
+    """返回路径所在设备的标识，同一块磁盘或同一网络共享返回相同的值"""
+    try:
+        return os.stat(path).st_dev
+    except OSError:
+        # 无法访问时按盘符或 UNC 共享名归类
+        drive = os.path.splitdrive(os.path.abspath(path))[0]
+        return drive.lower() or path
+
+
+class BatchScanScheduler:
+    """多根目录扫描调度器
+    
+    所有根目录共用一个线程池，同时限制每个设备上并发扫描的数量，
+    避免同一块机械硬盘或同一网络共享被多个扫描同时访问而来回寻道，
+    不同设备上的扫描则可以并行进行。
+    """
+    
+    def __init__(self, max_workers=4, per_device_limit=1):
+        self.max_workers = max_workers
+        self.per_device_limit = per_device_limit
+        self.is_cancelled = False
+    
+    def run(self, roots, scan_func, on_done=None):
+        """按调度规则扫描所有根目录，返回与 roots 顺序一致的结果列表"""
+        # concurrent.futures 会连带导入 logging 等模块，只在批量扫描时才导入
+        from collections import deque
+        from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+        
+        pending = {}
+        for position, root in enumerate(roots):
+            pending.setdefault(device_key(root), deque()).append((position, root))
+        
+        results = [None] * len(roots)
+        running = {}
+        active = {}
+        finished_count = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                # 各设备轮流派发，保证每个设备都能尽早开始
+                dispatched = True
+                while dispatched and not self.is_cancelled and len(running) < self.max_workers:
+                    dispatched = False
+                    for device in list(pending):
+                        if len(running) >= self.max_workers:
+                            break
+                        if active.get(device, 0) >= self.per_device_limit:
+                            continue
+                        position, root = pending[device].popleft()
+                        if not pending[device]:
+                            del pending[device]
+                        future = executor.submit(scan_func, root)
+                        running[future] = (position, root, device)
+                        active[device] = active.get(device, 0) + 1
+                        dispatched = True
+                
+                if self.is_cancelled:
+                    pending.clear()
+                if not running:
+                    break
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    position, root, device = running.pop(future)
+                    active[device] -= 1
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = {"root": root, "error": f"扫描出错: {str(e)}"}
+                    result["device"] = device
+                    results[position] = result
+                    finished_count += 1
+                    if on_done:
+                        on_done(finished_count, len(roots), root)
+        return results
+    
+    def cancel(self):
+        """不再派发新的扫描，已开始的扫描会继续完成"""
+        self.is_cancelled = True
+
+
+class BatchScanWorker(QThread):
+    """批量扫描工作线程"""
+    progress_updated = Signal(int, int, str)  # 已完成, 总数, 刚完成的路径
+    finished = Signal(str)
+    
+    def __init__(self, roots, max_workers=4, per_device_limit=1):
+        super().__init__()
+        self.roots = self.normalize_roots(roots)
+        self.scheduler = BatchScanScheduler(max_workers, per_device_limit)
+    
+    def run(self):
+        try:
+            start_time = time.time()
+            results = self.scheduler.run(self.roots, self.scan_root, self.progress_updated.emit)
+            self.finished.emit(self.format_report(results, time.time() - start_time))
+        except Exception as e:
+            self.finished.emit(f"批量扫描出错: {str(e)}")
+    
+    @staticmethod
+    def normalize_roots(roots):
+        """统一为绝对路径并去重，忽略大小写差异和末尾的分隔符"""
+        unique = []
+        seen = set()
+        for root in roots:
+            path = os.path.abspath(root)
+            key = os.path.normcase(path)
+            if key not in seen:
+                seen.add(key)
+                unique.append(path)
+        return unique
+    
+    @staticmethod
+    def find_parent_root(root, roots):
+        """返回包含 root 的另一个根目录，没有则返回 None"""
+        key = os.path.normcase(root)
+        for other in roots:
+            other_key = os.path.normcase(other)
+            if other_key == key:
+                continue
+            try:
+                if os.path.commonpath([key, other_key]) == other_key:
+                    return other
+            except ValueError:
+                # 不同盘符之间无法比较
+                continue
+        return None
+    
+    def scan_root(self, root):
+        """扫描单个根目录，只保留汇总结果，不保留整棵索引"""
+        if not os.path.exists(root):
+            return {"root": root, "error": "错误：指定的路径不存在！"}
+        if not os.path.isdir(root):
+            return {"root": root, "error": "错误：指定的路径不是文件夹！"}
+        
+        start_time = time.time()
+        index = FolderSizeIndex(root)
+        try:
+            index.build()
+        except PermissionError:
+            return {"root": root, "error": "错误：没有权限访问该文件夹！"}
+        except OSError as e:
+            return {"root": root, "error": f"扫描时发生错误: {str(e)}"}
+        return {
+            "root": root,
+            "size": index.total.get(index.root, 0),
+            "files": index.total_files.get(index.root, 0),
+            "folders": index.subfolder_sizes(),
+            "elapsed": time.time() - start_time,
+        }
+    
+    def format_report(self, results, elapsed):
+        """生成合并后的扫描报告"""
+        format_size = FolderScanWorker.format_size
+        results = [r for r in results if r is not None]
+        succeeded = [r for r in results if "error" not in r]
+        devices = {r["device"] for r in results}
+        
+        # 位于其他根目录之内的路径已经包含在外层的大小中，不重复计入总大小
+        # 外层路径扫描失败时，内层路径仍计入总大小
+        nested_in = {}
+        succeeded_roots = [r["root"] for r in succeeded]
+        for item in results:
+            parent = self.find_parent_root(item["root"], succeeded_roots)
+            if parent:
+                nested_in[item["root"]] = parent
+        total_size = sum(r["size"] for r in succeeded if r["root"] not in nested_in)
+        
+        result = f"批量扫描 {len(results)} 个路径（{len(devices)} 个设备），用时 {elapsed:.1f} 秒\n"
+        result += f"总大小: {format_size(total_size)}\n"
+        if nested_in:
+            result += f"{len(nested_in)} 个路径位于其他扫描路径之内，未计入总大小\n"
+        if len(results) < len(self.roots):
+            result += f"已取消，{len(self.roots) - len(results)} 个路径未扫描\n"
+        result += "=" * 50 + "\n\n"
+        
+        result += "按大小排序:\n\n"
+        for item in sorted(succeeded, key=lambda r: r["size"], reverse=True):
+            result += f"   {format_size(item['size']):>12}  {item['root']}"
+            if item["root"] in nested_in:
+                result += f"  （位于 {nested_in[item['root']]} 内）"
+            result += "\n"
+        for item in results:
+            if "error" in item:
+                result += f"   {'失败':>12}  {item['root']}\n"
+        result += "\n"
+        
+        for item in results:
+            result += "-" * 50 + "\n"
+            result += f"📂 {item['root']}\n"
+            if item["root"] in nested_in:
+                result += f"   位于 {nested_in[item['root']]} 内，不计入总大小\n"
+            if "error" in item:
+                result += f"   {item['error']}\n\n"
+                continue
+            result += f"   大小: {format_size(item['size'])}，文件数: {item['files']}，用时 {item['elapsed']:.1f} 秒\n\n"
+            for folder_name, size in item["folders"]:
+                size_str = format_size(size) if isinstance(size, int) else size
+                result += f"   📁 {folder_name}  {size_str}\n"
+            result += "\n"
+        return result
+    
+    def cancel(self):
+        """取消批量扫描"""
+        self.scheduler.cancel()
+
+
 class DownloadWorker(QThread):
     """下载工作线程"""
     progress_updated = Signal(int, str, str)  # 进度, 速度, 状态
@@ -125,6 +1452,12 @@ class DownloadWorker(QThread):
     
     def download_file(self):
         """执行文件下载"""
+        # 下载依赖较重，首次使用时才导入，以加快主窗口启动
+        with startup_profiler.measure_import("requests"):
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+        
         # 创建会话并设置重试策略
         session = requests.Session()
         retry_strategy = Retry(
@@ -439,6 +1772,9 @@ class DownloadWindow(QWidget):
         
         # 尝试从URL中提取文件名
         if url:
+            # 只有下载工具用到，首次使用时才导入
+            with startup_profiler.measure_import("urllib.parse"):
+                from urllib.parse import urlparse
             parsed_url = urlparse(url)
             filename = os.path.basename(parsed_url.path)
             if not filename or '.' not in filename:
@@ -543,6 +1879,10 @@ class FolderScanWindow(QWidget):
         super().__init__()
         self.init_ui()
         self.scan_worker = None
+        self.watch_worker = None
+        self.snapshot_worker = None
+        self.batch_worker = None
+        self.scan_index = None
     
     def init_ui(self):
         self.setWindowTitle("文件夹检索工具")
@@ -567,11 +1907,41 @@ class FolderScanWindow(QWidget):
         confirm_button = QPushButton("确认")
         confirm_button.setFont(QFont("Microsoft YaHei", 10))
         confirm_button.clicked.connect(self.scan_folder)
+
+        self.watch_checkbox = QCheckBox("实时监控")
+        self.watch_checkbox.setFont(QFont("Microsoft YaHei", 10))
+        self.watch_checkbox.setToolTip("扫描完成后持续监听文件变化，增量更新文件夹大小")
+        self.watch_checkbox.toggled.connect(self.on_watch_toggled)
         
         input_layout.addWidget(path_label)
         input_layout.addWidget(self.path_input)
         input_layout.addWidget(browse_button)
         input_layout.addWidget(confirm_button)
+        input_layout.addWidget(self.watch_checkbox)
+        
+        # 快照操作区域
+        snapshot_layout = QHBoxLayout()
+        
+        self.save_snapshot_button = QPushButton("保存快照")
+        self.save_snapshot_button.setFont(QFont("Microsoft YaHei", 10))
+        self.save_snapshot_button.setToolTip("把最近一次扫描的逐目录大小保存为快照文件")
+        self.save_snapshot_button.clicked.connect(self.save_snapshot)
+        self.save_snapshot_button.setEnabled(False)
+        
+        diff_snapshot_button = QPushButton("对比快照")
+        diff_snapshot_button.setFont(QFont("Microsoft YaHei", 10))
+        diff_snapshot_button.setToolTip("选择新旧两个快照，列出增长、减少、新增和删除的文件夹")
+        diff_snapshot_button.clicked.connect(self.diff_snapshots)
+        
+        batch_button = QPushButton("批量扫描")
+        batch_button.setFont(QFont("Microsoft YaHei", 10))
+        batch_button.setToolTip("一次扫描多个文件夹，同一磁盘上的文件夹依次扫描，不同磁盘并行扫描")
+        batch_button.clicked.connect(self.batch_scan)
+        
+        snapshot_layout.addWidget(self.save_snapshot_button)
+        snapshot_layout.addWidget(diff_snapshot_button)
+        snapshot_layout.addWidget(batch_button)
+        snapshot_layout.addStretch()
         
         # 结果显示区域
         result_label = QLabel("扫描结果:")
@@ -581,9 +1951,14 @@ class FolderScanWindow(QWidget):
         self.result_text.setFont(QFont("Consolas", 9))
         self.result_text.setPlaceholderText("点击确认按钮开始扫描...")
         
+        self.watch_status_label = QLabel("")
+        self.watch_status_label.setFont(QFont("Microsoft YaHei", 9))
+        
         layout.addLayout(input_layout)
+        layout.addLayout(snapshot_layout)
         layout.addWidget(result_label)
         layout.addWidget(self.result_text)
+        layout.addWidget(self.watch_status_label)
         
         self.setLayout(layout)
     
@@ -601,11 +1976,21 @@ class FolderScanWindow(QWidget):
             QMessageBox.warning(self, "警告", "请输入文件夹路径！")
             return
         
+        busy_message = self.busy_message()
+        if busy_message:
+            QMessageBox.warning(self, "警告", busy_message)
+            return
+        
+        # 新的扫描开始前停止旧的监控
+        self.stop_watch()
+        
         # 显示扫描中状态
         self.result_text.setText("正在扫描，请稍候...")
         
         # 创建并启动工作线程
-        self.scan_worker = FolderScanWorker(folder_path)
+        self.scan_index = None
+        self.save_snapshot_button.setEnabled(False)
+        self.scan_worker = FolderScanWorker(folder_path, watch=self.watch_checkbox.isChecked())
         self.scan_worker.finished.connect(self.on_scan_finished)
         self.scan_worker.start()
     
@@ -613,8 +1998,161 @@ class FolderScanWindow(QWidget):
         """扫描完成回调"""
         self.result_text.setText(result)
         if self.scan_worker:
+            index = self.scan_worker.index
+            watcher = self.scan_worker.watcher
             self.scan_worker.deleteLater()
             self.scan_worker = None
+            if index is not None:
+                self.scan_index = index
+                self.save_snapshot_button.setEnabled(True)
+                if self.watch_checkbox.isChecked():
+                    self.start_watch(index, watcher)
+                    watcher = None
+            if watcher is not None:
+                # 扫描期间取消了实时监控
+                watcher.close()
+    
+    def busy_message(self):
+        """扫描、批量扫描和快照任务都会改写结果区，同一时间只允许一个运行"""
+        if self.scan_worker or self.batch_worker:
+            return "扫描正在进行，请稍候！"
+        if self.snapshot_worker:
+            return "快照任务正在进行，请稍候！"
+        return None
+    
+    def start_watch(self, index, watcher=None):
+        """开始监控已扫描的目录"""
+        self.watch_worker = FolderWatchWorker(index, watcher)
+        self.watch_worker.sizes_updated.connect(self.result_text.setText)
+        self.watch_worker.status_changed.connect(self.watch_status_label.setText)
+        self.watch_worker.start()
+    
+    def stop_watch(self):
+        """停止实时监控"""
+        if self.watch_worker:
+            self.watch_worker.stop()
+            self.watch_worker.wait()
+            self.watch_worker.deleteLater()
+            self.watch_worker = None
+            self.watch_status_label.setText("实时监控已停止")
+    
+    def save_snapshot(self):
+        """保存当前扫描结果为快照"""
+        busy_message = self.busy_message()
+        if busy_message:
+            QMessageBox.warning(self, "警告", busy_message)
+            return
+        if self.scan_index is None:
+            QMessageBox.warning(self, "警告", "请先完成一次扫描！")
+            return
+        
+        default_name = time.strftime("scan_%Y%m%d_%H%M%S.dsnap")
+        save_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "保存快照",
+            default_name,
+            "扫描快照 (*.dsnap)"
+        )
+        if not save_path:
+            return
+        
+        self.watch_status_label.setText("正在保存快照...")
+        self.snapshot_worker = SnapshotSaveWorker(self.scan_index, save_path)
+        self.snapshot_worker.finished.connect(self.on_snapshot_saved)
+        self.snapshot_worker.start()
+    
+    def on_snapshot_saved(self, message):
+        """快照保存完成回调"""
+        self.watch_status_label.setText(message)
+        if self.snapshot_worker:
+            self.snapshot_worker.deleteLater()
+            self.snapshot_worker = None
+    
+    def diff_snapshots(self):
+        """选择两个快照并进行对比"""
+        busy_message = self.busy_message()
+        if busy_message:
+            QMessageBox.warning(self, "警告", busy_message)
+            return
+        
+        old_path, _ = QFileDialog.getOpenFileName(self, "选择旧快照", "", "扫描快照 (*.dsnap)")
+        if not old_path:
+            return
+        new_path, _ = QFileDialog.getOpenFileName(self, "选择新快照", os.path.dirname(old_path), "扫描快照 (*.dsnap)")
+        if not new_path:
+            return
+        
+        # 对比结果会覆盖结果区，停止实时监控以免被刷新
+        self.stop_watch()
+        self.result_text.setText("正在对比快照，请稍候...")
+        self.snapshot_worker = SnapshotDiffWorker(old_path, new_path)
+        self.snapshot_worker.finished.connect(self.on_snapshot_diffed)
+        self.snapshot_worker.start()
+    
+    def on_snapshot_diffed(self, result):
+        """快照对比完成回调"""
+        self.result_text.setText(result)
+        if self.snapshot_worker:
+            self.snapshot_worker.deleteLater()
+            self.snapshot_worker = None
+    
+    def batch_scan(self):
+        """批量扫描多个文件夹"""
+        busy_message = self.busy_message()
+        if busy_message:
+            QMessageBox.warning(self, "警告", busy_message)
+            return
+        
+        text, ok = QInputDialog.getMultiLineText(
+            self,
+            "批量扫描",
+            "每行输入一个文件夹路径:",
+            self.path_input.text().strip()
+        )
+        if not ok:
+            return
+        
+        roots = [line.strip() for line in text.splitlines() if line.strip()]
+        if not roots:
+            QMessageBox.warning(self, "警告", "请输入文件夹路径！")
+            return
+        
+        self.stop_watch()
+        # 批量扫描不保留索引，之前的单目录结果不再对应当前显示的报告
+        self.scan_index = None
+        self.save_snapshot_button.setEnabled(False)
+        self.batch_worker = BatchScanWorker(roots)
+        self.result_text.setText(f"正在批量扫描 {len(self.batch_worker.roots)} 个路径，请稍候...")
+        self.batch_worker.progress_updated.connect(self.on_batch_progress)
+        self.batch_worker.finished.connect(self.on_batch_finished)
+        self.batch_worker.start()
+    
+    def on_batch_progress(self, done, total, root):
+        """批量扫描进度回调"""
+        self.watch_status_label.setText(f"批量扫描: {done}/{total} 完成，最近完成: {root}")
+    
+    def on_batch_finished(self, result):
+        """批量扫描完成回调"""
+        self.result_text.setText(result)
+        if self.batch_worker:
+            self.batch_worker.deleteLater()
+            self.batch_worker = None
+    
+    def on_watch_toggled(self, checked):
+        """切换实时监控"""
+        if not checked:
+            self.stop_watch()
+            return
+        # 扫描进行中时由 on_scan_finished 负责启动；已有扫描结果则直接开始监控
+        if self.scan_index is not None and self.watch_worker is None and self.scan_worker is None:
+            self.start_watch(self.scan_index)
+    
+    def closeEvent(self, event):
+        """关闭窗口时停止监控和批量扫描"""
+        self.stop_watch()
+        if self.batch_worker:
+            self.batch_worker.cancel()
+        super().closeEvent(event)
 
 
 class MainWindow(QMainWindow):
@@ -626,6 +2164,10 @@ class MainWindow(QMainWindow):
         self.folder_scan_window = None
         self.download_window = None
     
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        startup_profiler.mark_first_paint()
+    
     def init_ui(self):
         self.setWindowTitle("Denny自动程序合辑")
         self.setGeometry(100, 100, 400, 300)
@@ -704,7 +2246,8 @@ class MainWindow(QMainWindow):
     def open_folder_scan_window(self):
         """打开文件夹检索窗口"""
         if self.folder_scan_window is None:
-            self.folder_scan_window = FolderScanWindow()
+            with startup_profiler.measure("打开文件夹检索工具"):
+                self.folder_scan_window = FolderScanWindow()
         
         self.folder_scan_window.show()
         self.folder_scan_window.raise_()
@@ -713,23 +2256,53 @@ class MainWindow(QMainWindow):
     def open_download_window(self):
         """打开下载工具窗口"""
         if self.download_window is None:
-            self.download_window = DownloadWindow()
+            with startup_profiler.measure("打开下载工具"):
+                self.download_window = DownloadWindow()
         
         self.download_window.show()
         self.download_window.raise_()
         self.download_window.activateWindow()
 
 
+def parse_startup_args(argv):
+    """解析启动参数，未识别的参数原样交给 Qt"""
+    report_path = None
+    qt_argv = []
+    for arg in argv:
+        if arg == "--startup-report":
+            report_path = "startup_report.txt"
+        elif arg.startswith("--startup-report="):
+            report_path = arg.split("=", 1)[1] or "startup_report.txt"
+        elif arg == "--quit-after-paint":
+            startup_profiler.quit_after_paint = True
+        else:
+            qt_argv.append(arg)
+    return report_path, qt_argv
+
+
 def main():
-    app = QApplication(sys.argv)
+    report_path, qt_argv = parse_startup_args(sys.argv)
     
-    # 设置应用程序样式
-    app.setStyle('Fusion')
+    with startup_profiler.measure("创建 QApplication"):
+        app = QApplication(qt_argv)
+        
+        # 设置应用程序样式
+        app.setStyle('Fusion')
+    
+    with startup_profiler.measure("创建主窗口"):
+        window = MainWindow()
+        window.show()
     
-    window = MainWindow()
-    window.show()
+    exit_code = app.exec()
+    
+    if report_path:
+        try:
+            startup_profiler.write_report(report_path)
+        except OSError as e:
+            if sys.stderr is not None:
+                print(f"写入启动耗时报告失败: {str(e)}", file=sys.stderr)
     
-    sys.exit(app.exec())
+    sys.exit(exit_code)
 
 
 if __name__ == "__main__":